@@ -7,7 +7,7 @@ Funktion:
 •⁠  ⁠Berechnet Dachfläche (≈ Gebäude-Footprint) in m²
 •⁠  ⁠Filtert ab minimaler Fläche (Default 100 m²)
 •⁠  ⁠Heuristische Priorisierung (Fläche + Kompaktheit)
-•⁠  ⁠Exportiert CSV und GeoJSON
+•⁠  ⁠Exportiert CSV und GeoJSON (Default: ein Feature pro Zeile)
 
 Nutzung:
   pip install -r requirements.txt  # siehe unten
@@ -15,7 +15,7 @@ Nutzung:
 
 Outputs:
   ./out/au_sg_big_roofs.csv
-  ./out/au_sg_big_roofs.geojson
+  ./out/au_sg_big_roofs.geojsonl  (zeilengetrenntes GeoJSON; --format geojson für ./out/au_sg_big_roofs.geojson)
 
 Hinweis:
 •⁠  ⁠MVP verarbeitet primär OSM-Ways (Gebäudeumrisse). Multipolygone (Relations) werden teilweise ignoriert.
@@ -24,18 +24,31 @@ Hinweis:
 """
 
 import argparse
-import json
+import csv
+import functools
+import hashlib
+import itertools
 import math
 import os
-from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
-
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import List, Tuple, Optional, Dict, Iterator, Deque
+
+import ijson
+import numpy as np
+import orjson
 import requests
-from shapely.geometry import Polygon, mapping
+import shapely
+import urllib3
+import zstandard as zstd
+from ijson.common import ObjectBuilder
+from requests.adapters import HTTPAdapter
+from shapely.geometry import mapping
+from shapely.geometry.base import BaseGeometry
 from shapely.ops import unary_union
-from shapely.validation import make_valid
 from pyproj import Transformer
-import pandas as pd
+from urllib3.util import Retry
 
 # -------------------------
 # Konfiguration
@@ -46,27 +59,53 @@ OVERPASS_ENDPOINTS = [
     "https://overpass.openstreetmap.ru/api/interpreter",
 ]
 
+# Überlastete Mirrors antworten mit 429/5xx: am selben Endpoint mit
+# exponentiellem Backoff (und Retry-After) wiederholen. Verbindungsfehler
+# werden nicht wiederholt, dort wechselt overpass_query den Endpoint.
+_OVERPASS_RETRY = Retry(
+    total=5,
+    connect=0,
+    read=0,
+    backoff_factor=2,
+    status_forcelist=[429, 502, 503, 504],
+    allowed_methods=frozenset({"POST"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(max_retries=_OVERPASS_RETRY))
+
+# Anzahl Overpass-Elemente, die gemeinsam (in einem Worker-Prozess) durch die Geometrie-Pipeline gehen
+BATCH_SIZE = 5_000
+
+# Lokaler Cache für Overpass-Antworten (zstd-komprimiert), siehe overpass_query
+CACHE_DIR = "cache"
+
 # Zentrum Au SG – Koordinaten (WGS84)
 # Quelle: approximiert (Gemeinde Au, Kanton St. Gallen)
 AU_SG_LAT = 47.4319
 AU_SG_LON = 9.6397
 
-# Transformer: WGS84 -> LV95 (EPSG:2056)
-_transformer_to_lv95 = Transformer.from_crs("EPSG:4326", "EPSG:2056", always_xy=True)
-_transformer_to_wgs84 = Transformer.from_crs("EPSG:2056", "EPSG:4326", always_xy=True)
+WGS84 = "EPSG:4326"
+LV95 = "EPSG:2056"  # CH1903+ / LV95
 
 
-def to_lv95(lon: float, lat: float) -> Tuple[float, float]:
-    x, y = _transformer_to_lv95.transform(lon, lat)
-    return x, y
+@functools.lru_cache(maxsize=16)
+def _get_transformer(src: str, dst: str) -> Transformer:
+    """Liefert einen (gecachten) Transformer src -> dst.
+
+    Der Aufbau eines Transformers ist um Grössenordnungen teurer als eine
+    Transformation selbst; darum nie pro Aufruf neu erzeugen.
+    """
+    return Transformer.from_crs(src, dst, always_xy=True)
 
 
 def to_wgs84(x: float, y: float) -> Tuple[float, float]:
-    lon, lat = _transformer_to_wgs84.transform(x, y)
+    lon, lat = _get_transformer(LV95, WGS84).transform(x, y)
     return lon, lat
 
 
-@dataclass
+@dataclass(slots=True)
 class RoofCandidate:
     osm_type: str  # 'way' oder 'relation'
     osm_id: int
@@ -77,188 +116,425 @@ class RoofCandidate:
     score: float
     centroid_lat: float
     centroid_lon: float
-    google_maps: str
-    osm_url: str
+    geom_wgs84: BaseGeometry = field(repr=False)  # Original-Footprint (lon/lat)
+
+    # Links erst beim Export bauen, nur für die Gebäude, die den Filter überstehen
+    @property
+    def google_maps(self) -> str:
+        return f"https://www.google.com/maps/search/?api=1&query={self.centroid_lat:.6f}%2C{self.centroid_lon:.6f}"
+
+    @property
+    def osm_url(self) -> str:
+        return f"https://www.openstreetmap.org/{self.osm_type}/{self.osm_id}"
+
+
+@dataclass
+class CandidateArrays:
+    """Alle berechneten Gebäude spaltenweise (ein numpy-Array pro Feld).
+
+    Filtern und Ranking laufen vektorisiert auf den Arrays; RoofCandidate-Objekte
+    werden erst für die ausgewählten Gebäude erzeugt (siehe rank_and_filter).
+    """
+    osm_type: np.ndarray  # object: 'way' oder 'relation'
+    osm_id: np.ndarray  # object
+    name: np.ndarray  # object
+    building: np.ndarray  # object
+    area_m2: np.ndarray  # float64
+    compactness: np.ndarray  # float64
+    score: np.ndarray  # float64
+    centroid_lat: np.ndarray  # float64
+    centroid_lon: np.ndarray  # float64
+    geom_wgs84: np.ndarray  # object (shapely)
+
+    def __len__(self) -> int:
+        return len(self.area_m2)
+
+    @classmethod
+    def empty(cls) -> "CandidateArrays":
+        return cls(**{
+            f.name: np.empty(0, dtype=float if f.name in _FLOAT_COLUMNS else object)
+            for f in fields(cls)
+        })
+
+    @classmethod
+    def concat(cls, parts: List["CandidateArrays"]) -> "CandidateArrays":
+        if not parts:
+            return cls.empty()
+        return cls(**{f.name: np.concatenate([getattr(p, f.name) for p in parts]) for f in fields(cls)})
+
+    def candidate(self, i: int) -> RoofCandidate:
+        return RoofCandidate(
+            osm_type=self.osm_type[i],
+            osm_id=self.osm_id[i],
+            name=self.name[i],
+            building=self.building[i],
+            area_m2=float(self.area_m2[i]),
+            compactness=float(self.compactness[i]),
+            score=float(self.score[i]),
+            centroid_lat=float(self.centroid_lat[i]),
+            centroid_lon=float(self.centroid_lon[i]),
+            geom_wgs84=self.geom_wgs84[i],
+        )
+
+
+_FLOAT_COLUMNS = {"area_m2", "compactness", "score", "centroid_lat", "centroid_lon"}
 
 
-def overpass_query(lat: float, lon: float, radius_m: int) -> Dict:
-    """Fragt Overpass nach Gebäuden im Umkreis ab und liefert raw JSON zurück."""
+def overpass_query(lat: float, lon: float, radius_m: int, cache_dir: Optional[str] = CACHE_DIR) -> Iterator[Dict]:
+    """Fragt Overpass nach Gebäuden im Umkreis ab und liefert die Elemente gestreamt (eins nach dem anderen).
+
+    Ist cache_dir gesetzt, wird die Antwort dort (zstd-komprimiert) abgelegt und bei
+    gleichen Parametern von dort gelesen, statt Overpass erneut abzufragen.
+    """
+    # Nur die benötigten Tags (name, building) zurückgeben statt aller OSM-Tags:
+    # convert erzeugt abgeleitete Elemente mit Original-Typ, -ID und -Geometrie.
     q = f"""
     [out:json][timeout:120];
-    (
-      way["building"](around:{radius_m},{lat},{lon});
-      relation["building"](around:{radius_m},{lat},{lon});
-    );
-    out tags geom;
+    way["building"](around:{radius_m},{lat},{lon});
+    convert way ::id = id(), ::geom = geom(), name = t["name"], building = t["building"];
+    out geom;
+    relation["building"](around:{radius_m},{lat},{lon});
+    convert relation ::id = id(), ::geom = geom(), name = t["name"], building = t["building"];
+    out geom;
     """
+    cache_path = None
+    if cache_dir:
+        # Query mit im Schlüssel, damit eine geänderte Abfrage keinen alten Cache trifft
+        key = hashlib.sha1(f"{lat}:{lon}:{radius_m}:{q}".encode()).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{key}.json.zst")
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as f, zstd.ZstdDecompressor().stream_reader(f) as raw:
+                yield from ijson.items(raw, "elements.item", use_float=True)
+            return
+
     last_exc = None
     for ep in OVERPASS_ENDPOINTS:
+        yielded = False
         try:
-            r = requests.post(ep, data={"data": q}, timeout=180)
-            r.raise_for_status()
-            return r.json()
-        except Exception as e:
+            for el in _overpass_query_with_retry(ep, q, cache_path):
+                yielded = True
+                yield el
+            return
+        except requests.HTTPError as e:
+            # 429/5xx wurden bereits am selben Endpoint wiederholt -> nächster Mirror
+            last_exc = e
+            continue
+        except (requests.RequestException, urllib3.exceptions.HTTPError, ijson.JSONError) as e:
+            # Bricht der Stream mitten drin ab, würde ein anderer Mirror Duplikate liefern
+            if yielded:
+                raise
+            # Verbindungsfehler/Timeout: sofort zum nächsten Mirror wechseln
             last_exc = e
             continue
     raise RuntimeError(f"Overpass nicht erreichbar: {last_exc}")
 
 
-def polygon_from_geom(geom: List[Dict[str, float]]) -> Optional[Polygon]:
-    """Erzeugt ein Shapely-Polygon aus Overpass 'geom' (Liste von Punkten mit lat/lon)."""
-    if not geom or len(geom) < 3:
+class _TeeReader:
+    """File-like Wrapper, der alles Gelesene zusätzlich in sink schreibt."""
+
+    def __init__(self, raw, sink):
+        self._raw = raw
+        self._sink = sink
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        self._sink.write(data)
+        return data
+
+
+def _iter_elements(f, remarks: List[str]) -> Iterator[Dict]:
+    """Parst 'elements' gestreamt aus f und sammelt ein top-level 'remark' in remarks.
+
+    Overpass meldet Laufzeitfehler (z.B. "Query timed out") mit HTTP 200, einer
+    abgeschnittenen 'elements'-Liste und einem 'remark'.
+    """
+    builder = None
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == "elements.item" and event in ("end_map", "end_array"):
+                yield builder.value
+                builder = None
+        elif prefix == "elements.item":
+            if event in ("start_map", "start_array"):
+                builder = ObjectBuilder()
+                builder.event(event, value)
+            else:
+                yield value
+        elif prefix == "remark":
+            remarks.append(value)
+
+
+def _overpass_query_with_retry(endpoint: str, q: str, cache_path: Optional[str] = None) -> Iterator[Dict]:
+    """Schickt die Query an einen Endpoint; 429/5xx werden mit Backoff wiederholt (siehe _SESSION).
+
+    Die Antwort wird mit ijson elementweise geparst, statt sie komplett als dict zu laden.
+    Mit cache_path werden die Rohdaten parallel dazu komprimiert gespeichert.
+    """
+    with _SESSION.post(endpoint, data={"data": q}, timeout=180, stream=True) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True  # gzip/deflate transparent entpacken
+        remarks: List[str] = []
+        if cache_path is None:
+            yield from _iter_elements(r.raw, remarks)
+            _warn_remarks(remarks)
+            return
+
+        # Erst nach vollständigem Download umbenennen, damit kein halber Cache liegen bleibt
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f, zstd.ZstdCompressor().stream_writer(f) as sink:
+                tee = _TeeReader(r.raw, sink)
+                yield from _iter_elements(tee, remarks)
+                while tee.read(64 * 1024):
+                    pass
+            # Daten, die nach einem Overpass-Fehler (remark) geliefert wurden, nie cachen
+            if remarks:
+                _warn_remarks(remarks)
+            else:
+                os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _warn_remarks(remarks: List[str]) -> None:
+    for remark in remarks:
+        print(f"Warnung: Overpass meldet '{remark}' – Ergebnis evtl. unvollständig.")
+
+
+def ring_from_geom(geom) -> Optional[List[Tuple[float, float]]]:
+    """Erzeugt einen geschlossenen Ring (lon/lat-Tupel) aus der Overpass-Geometrie.
+
+    Akzeptiert sowohl 'out geom' von OSM-Elementen (Liste von Punkten mit lat/lon)
+    als auch die GeoJSON-Geometrie abgeleiteter Elemente (LineString/Polygon).
+    """
+    if not geom:
+        return None
+    if isinstance(geom, dict):
+        gtype = geom.get("type")
+        if gtype == "LineString":
+            coords = [(x, y) for x, y, *_ in geom.get("coordinates", [])]
+        elif gtype == "Polygon" and geom.get("coordinates"):
+            coords = [(x, y) for x, y, *_ in geom["coordinates"][0]]
+        else:
+            # Multipolygone/Collections (Relations) werden im MVP ignoriert
+            return None
+    else:
+        # Overpass liefert lat/lon; wir brauchen lon/lat Reihenfolge für Shapely (x=lon, y=lat)
+        coords = [(pt["lon"], pt["lat"]) for pt in geom]
+    if len(coords) < 3:
         return None
-    # Overpass liefert lat/lon; wir brauchen lon/lat Reihenfolge für Shapely (x=lon, y=lat)
-    coords = [(pt["lon"], pt["lat"]) for pt in geom]
     # Schliessen, falls nötig
     if coords[0] != coords[-1]:
         coords.append(coords[0])
-    try:
-        poly = Polygon(coords)
-        if not poly.is_valid:
-            poly = make_valid(poly)
-        # Einige building ways sind Linien (keine Fläche)
-        if poly.is_empty or poly.area == 0:
-            return None
-        return poly
-    except Exception:
+    # Ein LinearRing braucht mind. 4 Koordinaten (inkl. Schlusspunkt)
+    if len(coords) < 4:
         return None
+    return coords
 
 
-def area_m2_in_lv95(poly_wgs84: Polygon) -> float:
-    # Transformiere alle Koordinaten nach LV95 und berechne Fläche in m²
-    xys = [to_lv95(lon, lat) for lon, lat in poly_wgs84.exterior.coords]
-    p_lv95 = Polygon(xys)
-    return abs(p_lv95.area)
+def approx_bbox_area_m2(coords: np.ndarray, ring_sizes: np.ndarray) -> np.ndarray:
+    """Grobe Fläche der lon/lat-Bounding-Box je Ring in m² (ohne Projektion).
 
+    coords enthält alle Ringe hintereinander, ring_sizes die Anzahl Punkte je Ring.
+    """
+    starts = np.concatenate([[0], np.cumsum(ring_sizes)[:-1]])
+    lo = np.minimum.reduceat(coords, starts, axis=0)
+    hi = np.maximum.reduceat(coords, starts, axis=0)
+    dlon, dlat = (hi - lo).T
+    lat = np.radians((lo[:, 1] + hi[:, 1]) / 2)
+    # ~111.32 km pro Längengrad am Äquator (mal cos(lat)), ~110.54 km pro Breitengrad
+    return (dlon * np.cos(lat) * 111_320) * (dlat * 110_540)
 
-def perimeter_m_in_lv95(poly_wgs84: Polygon) -> float:
-    xys = [to_lv95(lon, lat) for lon, lat in poly_wgs84.exterior.coords]
-    p_lv95 = Polygon(xys)
-    return p_lv95.length
 
+def project_and_measure(polys_wgs84: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Projiziert alle Polygone einmal nach LV95 und liest Fläche, Umfang und Zentroid davon ab.
 
-def calc_compactness(area: float, perimeter: float) -> float:
-    if perimeter == 0:
-        return 0.0
+    Rückgabe: (Fläche m², Umfang m, Zentroide als N×2 lon/lat).
+    """
+    # Alle Koordinaten in einem einzigen PROJ-Aufruf nach LV95
+    tr = _get_transformer(WGS84, LV95)
+    polys_lv95 = shapely.transform(polys_wgs84, lambda xy: np.column_stack(tr.transform(xy[:, 0], xy[:, 1])))
+    areas = np.abs(shapely.area(polys_lv95))
+    perims = shapely.length(polys_lv95)
+    # Zentroid im metrischen System bestimmen und nur die Punkte zurückprojizieren
+    cxy = shapely.get_coordinates(shapely.centroid(polys_lv95))
+    lon, lat = to_wgs84(cxy[:, 0], cxy[:, 1])
+    return areas, perims, np.column_stack([lon, lat])
+
+
+def calc_compactness(area: np.ndarray, perimeter: np.ndarray) -> np.ndarray:
     # Polsby-Popper: 4πA / P²  -> 1 = Kreis, ~0 = sehr zerklüftet
-    return float((4 * math.pi * area) / (perimeter * perimeter))
-
-
-def guess_building_class(tags: Dict[str, str]) -> Optional[str]:
-    b = (tags or {}).get("building")
-    if not b:
-        return None
-    b = b.lower()
-    mapping_guess = {
-        "industrial": "industrial",
-        "warehouse": "warehouse",
-        "retail": "retail",
-        "commercial": "commercial",
-        "supermarket": "retail",
-        "school": "public",
-        "university": "public",
-        "hospital": "public",
-        "kindergarten": "public",
-        "public": "public",
-        "garage": "industrial",
-        "manufacture": "industrial",
-        "factory": "industrial",
-    }
-    for k, v in mapping_guess.items():
+    area = np.asarray(area, dtype=float)
+    perimeter = np.asarray(perimeter, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(perimeter > 0, (4 * math.pi * area) / (perimeter * perimeter), 0.0)
+
+
+BUILDING_CLASS_GUESS = {
+    "industrial": "industrial",
+    "warehouse": "warehouse",
+    "retail": "retail",
+    "commercial": "commercial",
+    "supermarket": "retail",
+    "school": "public",
+    "university": "public",
+    "hospital": "public",
+    "kindergarten": "public",
+    "public": "public",
+    "garage": "industrial",
+    "manufacture": "industrial",
+    "factory": "industrial",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _classify_building_tag(b: str) -> str:
+    # Exakte Treffer direkt, sonst Teilstring-Suche in Reihenfolge der Tabelle.
+    # Es gibt nur wenige verschiedene building-Werte, darum wird das Ergebnis gecacht.
+    exact = BUILDING_CLASS_GUESS.get(b)
+    if exact is not None:
+        return exact
+    for k, v in BUILDING_CLASS_GUESS.items():
         if k in b:
             return v
     # Default grob klassieren
     return "other"
 
 
-def build_candidate(el: Dict) -> Optional[RoofCandidate]:
-    osm_type = el.get("type")  # 'way' oder 'relation'
-    osm_id = el.get("id")
-    tags = el.get("tags", {})
-
-    geom = el.get("geometry") or el.get("geom")  # Overpass liefert 'geometry'
-    poly = polygon_from_geom(geom)
-    if poly is None:
+def guess_building_class(tags: Dict[str, str]) -> Optional[str]:
+    b = (tags or {}).get("building")
+    if not b:
         return None
+    return _classify_building_tag(b.lower())
 
-    area_m2 = area_m2_in_lv95(poly)
-    perim_m = perimeter_m_in_lv95(poly)
-    compact = calc_compactness(area_m2, perim_m)
 
-    centroid = poly.centroid
-    centroid_lon, centroid_lat = centroid.x, centroid.y
+def build_candidates(elements: List[Dict], min_area: float = 0.0) -> CandidateArrays:
+    """Berechnet Fläche, Kompaktheit und Score für alle Elemente auf einmal (shapely/GEOS-Arrays).
 
-    name = tags.get("name")
-    bcls = tags.get("building")
+    Gebäude, deren Bounding-Box schon deutlich kleiner als min_area ist, werden
+    vor der (teuren) Projektion verworfen.
+    """
+    kept: List[Dict] = []
+    flat: List[Tuple[float, float]] = []
+    ring_sizes: List[int] = []
+    for el in elements:
+        geom = el.get("geometry") or el.get("geom")  # Overpass liefert 'geometry'
+        ring = ring_from_geom(geom)
+        if ring is not None:
+            kept.append(el)
+            flat.extend(ring)
+            ring_sizes.append(len(ring))
+    if not kept:
+        return CandidateArrays.empty()
+
+    # Ein einziges Array für alle Ringe statt eines kleinen Arrays pro Gebäude
+    coords = np.array(flat, dtype=float)
+    sizes = np.array(ring_sizes)
+    if min_area > 0:
+        # Die Bounding-Box ist nie kleiner als das Polygon; Faktor 0.5 als Puffer
+        # für die Näherung. Der exakte Filter folgt in rank_and_filter.
+        big = approx_bbox_area_m2(coords, sizes) >= 0.5 * min_area
+        if not big.all():
+            coords = coords[np.repeat(big, sizes)]
+            sizes = sizes[big]
+            kept = [el for el, keep in zip(kept, big) if keep]
+            if not kept:
+                return CandidateArrays.empty()
+    ring_idx = np.repeat(np.arange(len(sizes)), sizes)
+    polys = shapely.polygons(shapely.linearrings(coords, indices=ring_idx))
+    # Validität für alle auf einmal prüfen, make_valid nur für die (wenigen) ungültigen
+    invalid = ~shapely.is_valid(polys)
+    if invalid.any():
+        polys[invalid] = shapely.make_valid(polys[invalid])
+
+    # Einige building ways sind Linien (keine Fläche)
+    ok = ~shapely.is_empty(polys) & (shapely.area(polys) > 0)
+    polys = polys[ok]
+    kept = [el for el, keep in zip(kept, ok) if keep]
+
+    areas, perims, centroids = project_and_measure(polys)
+    compact = calc_compactness(areas, perims)
 
     # Einfache Score-Heuristik: Fläche (70%) + Kompaktheit (30%)
     # Kompaktheit ~0..1, skaliert
-    score = 0.7 * (area_m2) + 0.3 * (compact * 10000)  # Kompaktheit schwächer skaliert
-
-    gmaps = f"https://www.google.com/maps/search/?api=1&query={centroid_lat:.6f}%2C{centroid_lon:.6f}"
-    osm_url = f"https://www.openstreetmap.org/{osm_type}/{osm_id}"
-
-    return RoofCandidate(
-        osm_type=osm_type,
-        osm_id=osm_id,
-        name=name,
-        building=bcls,
-        area_m2=float(area_m2),
-        compactness=float(compact),
-        score=float(score),
-        centroid_lat=float(centroid_lat),
-        centroid_lon=float(centroid_lon),
-        google_maps=gmaps,
-        osm_url=osm_url,
+    scores = 0.7 * areas + 0.3 * (compact * 10000)  # Kompaktheit schwächer skaliert
+
+    tags = [el.get("tags") or {} for el in kept]
+    return CandidateArrays(
+        osm_type=_object_array([el.get("type") for el in kept]),
+        osm_id=_object_array([el.get("id") for el in kept]),
+        # convert liefert fehlende Tags als leeren String
+        name=_object_array([t.get("name") or None for t in tags]),
+        building=_object_array([t.get("building") or None for t in tags]),
+        area_m2=areas,
+        compactness=compact,
+        score=scores,
+        centroid_lat=centroids[:, 1],
+        centroid_lon=centroids[:, 0],
+        geom_wgs84=polys,
     )
 
 
-def rank_and_filter(cands: List[RoofCandidate], min_area: float, limit: int) -> List[RoofCandidate]:
-    rows = [c for c in cands if c.area_m2 >= min_area]
-    rows.sort(key=lambda x: (-x.area_m2, -x.score))
-    return rows[:limit]
+def _object_array(values: List) -> np.ndarray:
+    # np.array(list) würde z.B. Strings in ein <U-Array umwandeln
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+def rank_and_filter(cands: CandidateArrays, min_area: float, limit: int) -> List[RoofCandidate]:
+    """Filtert nach min_area und liefert die `limit` grössten Dächer (Fläche, dann Score absteigend)."""
+    idx = np.flatnonzero(cands.area_m2 >= min_area)
+    areas = cands.area_m2[idx]
+    if 0 < limit < len(idx):
+        # Top-K per np.partition (O(N)) statt vollständiger Sortierung; Gleichstände
+        # an der Grenze bleiben drin, damit das Ergebnis der vollen Sortierung entspricht
+        kth_area = -np.partition(-areas, limit - 1)[limit - 1]
+        top = areas >= kth_area
+        idx, areas = idx[top], areas[top]
+    # lexsort ist stabil: letzter Schlüssel = primär
+    order = np.lexsort((-cands.score[idx], -areas))
+    return [cands.candidate(i) for i in idx[order][:limit]]
+
+
+CSV_FIELDS = [
+    "osm_type", "osm_id", "name", "building_tag", "area_m2", "compactness",
+    "score", "lat", "lon", "google_maps", "osm_url",
+]
 
 
 def export_csv(cands: List[RoofCandidate], path: str) -> None:
-    df = pd.DataFrame([
+    rows = (
         {
             "osm_type": c.osm_type,
             "osm_id": c.osm_id,
             "name": c.name,
             "building_tag": c.building,
-            "area_m2": round(c.area_m2, 1),
-            "compactness": round(c.compactness, 4),
-            "score": round(c.score, 1),
-            "lat": round(c.centroid_lat, 6),
-            "lon": round(c.centroid_lon, 6),
+            "area_m2": f"{c.area_m2:.1f}",
+            "compactness": f"{c.compactness:.4f}",
+            "score": f"{c.score:.1f}",
+            "lat": f"{c.centroid_lat:.6f}",
+            "lon": f"{c.centroid_lon:.6f}",
             "google_maps": c.google_maps,
             "osm_url": c.osm_url,
         }
         for c in cands
-    ])
+    )
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    df.to_csv(path, index=False)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=CSV_FIELDS, lineterminator="\n")
+        w.writeheader()
+        w.writerows(rows)
 
 
-def export_geojson(cands: List[RoofCandidate], path: str) -> None:
-    features = []
+def geojson_features(cands: List[RoofCandidate]) -> Iterator[Dict]:
     for c in cands:
-        # Re-konstruiere ein (kleines) Quadrat um den Zentroiden als Platzhalter-Geometrie
-        # (Für echte Footprints müsste man die Original-Polygone mitschreiben; hier MVP.)
-        # Optional: In Zukunft Original-Polygon speichern.
-        lon, lat = c.centroid_lon, c.centroid_lat
-        # winziges Quadrat (5m) im LV95, dann zurückprojizieren
-        x, y = to_lv95(lon, lat)
-        d = 2.5  # 5 m Kantenlänge
-        square_lv95 = [(x-d, y-d), (x+d, y-d), (x+d, y+d), (x-d, y+d), (x-d, y-d)]
-        coords = [to_wgs84(px, py) for (px, py) in square_lv95]
-        poly = {
-            "type": "Polygon",
-            "coordinates": [[(lng, lat) for (lng, lat) in coords]]
-        }
-        features.append({
+        yield {
             "type": "Feature",
-            "geometry": poly,
+            "geometry": mapping(c.geom_wgs84),
             "properties": {
                 "osm_type": c.osm_type,
                 "osm_id": c.osm_id,
@@ -270,11 +546,22 @@ def export_geojson(cands: List[RoofCandidate], path: str) -> None:
                 "google_maps": c.google_maps,
                 "osm_url": c.osm_url,
             }
-        })
-    fc = {"type": "FeatureCollection", "features": features}
+        }
+
+
+def export_geojson(cands: List[RoofCandidate], path: str) -> None:
+    fc = {"type": "FeatureCollection", "features": list(geojson_features(cands))}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(fc, option=orjson.OPT_APPEND_NEWLINE))
+
+
+def export_geojsonseq(cands: List[RoofCandidate], path: str) -> None:
+    """Schreibt zeilengetrenntes GeoJSON (ein Feature pro Zeile, ohne RS-Präfix nach RFC 8142), damit Konsumenten streamen können."""
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(fc, f, ensure_ascii=False, indent=2)
+    with open(path, "wb") as f:
+        for feature in geojson_features(cands):
+            f.write(orjson.dumps(feature, option=orjson.OPT_APPEND_NEWLINE))
 
 
 def main():
@@ -285,29 +572,44 @@ def main():
     ap.add_argument("--min-area", type=float, default=100.0, help="minimale Dachfläche in m²")
     ap.add_argument("--limit", type=int, default=1000, help="max. Anzahl Ergebnisse")
     ap.add_argument("--out-prefix", type=str, default="out/au_sg_big_roofs", help="Pfadpräfix für Exporte")
+    ap.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse für die Geometrie-Berechnung (Default: alle Kerne)")
+    ap.add_argument("--no-cache", action="store_true", help=f"Overpass-Cache ({CACHE_DIR}/) weder lesen noch schreiben")
+    ap.add_argument("--format", choices=["geojsonseq", "geojson"], default="geojsonseq",
+                    help="GeoJSON-Export: zeilengetrennt, ein Feature pro Zeile (geojsonseq) oder eine FeatureCollection (geojson)")
     args = ap.parse_args()
 
     radius_m = int(args.radius_km * 1000)
     print(f"Hole OSM-Daten: lat={args.lat}, lon={args.lon}, radius={radius_m} m ...")
-    data = overpass_query(args.lat, args.lon, radius_m)
-
-    elements = data.get("elements", [])
-    print(f"Empfangen: {len(elements)} Elemente. Verarbeite …")
-
-    candidates: List[RoofCandidate] = []
-    for el in elements:
-        c = build_candidate(el)
-        if c is not None:
-            candidates.append(c)
-
-    print(f"Gebäude mit Fläche berechnet: {len(candidates)}")
+    parts: List[CandidateArrays] = []
+    n_elements = 0
+    elements = overpass_query(args.lat, args.lon, radius_m, cache_dir=None if args.no_cache else CACHE_DIR)
+    workers = args.workers or os.cpu_count() or 1
+    # In Blöcken auf alle Kerne verteilen; höchstens 2 Blöcke pro Worker in der
+    # Warteschlange, damit der Overpass-Stream nicht komplett im Speicher landet
+    pending: Deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        while batch := list(itertools.islice(elements, BATCH_SIZE)):
+            n_elements += len(batch)
+            pending.append(ex.submit(build_candidates, batch, args.min_area))
+            if len(pending) >= 2 * workers:
+                parts.append(pending.popleft().result())
+        while pending:
+            parts.append(pending.popleft().result())
+    candidates = CandidateArrays.concat(parts)
+
+    print(f"Empfangen und verarbeitet: {n_elements} Elemente.")
+    print(f"Gebäude mit Fläche berechnet (nach Bounding-Box-Vorfilter): {len(candidates)}")
     ranked = rank_and_filter(candidates, args.min_area, args.limit)
     print(f"Gefiltert (>= {args.min_area} m²): {len(ranked)}")
 
     csv_path = f"{args.out_prefix}.csv"
-    geojson_path = f"{args.out_prefix}.geojson"
     export_csv(ranked, csv_path)
-    export_geojson(ranked, geojson_path)
+    if args.format == "geojson":
+        geojson_path = f"{args.out_prefix}.geojson"
+        export_geojson(ranked, geojson_path)
+    else:
+        geojson_path = f"{args.out_prefix}.geojsonl"
+        export_geojsonseq(ranked, geojson_path)
 
     print("\nFertig. Dateien:")
     print(" - ", csv_path)
@@ -319,8 +621,11 @@ if __name__ == "__main__":
 
 """
 requirements.txt (als Referenz):
+ijson
+numpy
+orjson
 requests
 shapely
 pyproj
-pandas
+zstandard
 """
\ No newline at end of file